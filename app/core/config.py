@@ -60,11 +60,16 @@ class Settings(BaseSettings):
     neo4j_uri: str = "bolt://localhost:7687"
     neo4j_user: str = "neo4j"
     neo4j_password: str = "password"
+    neo4j_database: str = "neo4j"
+    neo4j_max_connection_pool_size: int = 50
+    neo4j_connection_acquisition_timeout: float = 60.0  # seconds
+    neo4j_max_connection_lifetime: int = 3600  # seconds
     
     # Redis settings
     redis_host: str = "localhost"
     redis_port: int = 6379
     redis_password: Optional[str] = None
+    redis_max_connections: int = 50
     
     @property
     def redis_url(self) -> str:
@@ -1,8 +1,9 @@
 """Neo4j graph database connection and operations."""
 
-from neo4j import AsyncGraphDatabase, AsyncDriver, AsyncSession
-from typing import Dict, List, Any, Optional, Union
+from neo4j import AsyncGraphDatabase, AsyncDriver, AsyncSession, AsyncManagedTransaction, Record
+from typing import AsyncIterator, Dict, List, Any, Optional, Union
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 from datetime import datetime, timedelta
 import json
@@ -16,27 +17,68 @@ logger = logging.getLogger(__name__)
 class GraphDatabase:
     """Neo4j graph database manager."""
     
+    # One driver (and connection pool) is shared by every instance in the process
+    _shared_driver: Optional[AsyncDriver] = None
+    _shared_driver_users: int = 0
+    _driver_lock = asyncio.Lock()
+    
     def __init__(self):
         self.driver: Optional[AsyncDriver] = None
         self.uri = settings.neo4j_uri
         self.auth = (settings.neo4j_user, settings.neo4j_password)
+        # Naming the database avoids a home-database lookup per session
+        self.database = settings.neo4j_database
     
     async def connect(self):
         """Initialize Neo4j connection."""
+        if self.driver:
+            return
+        
         try:
-            self.driver = AsyncGraphDatabase.driver(self.uri, auth=self.auth)
-            # Test connection
-            await self.driver.verify_connectivity()
-            logger.info("Connected to Neo4j database")
+            # Creating the driver awaits, so concurrent first connects are
+            # serialized; otherwise each would build (and leak) its own driver
+            async with GraphDatabase._driver_lock:
+                if self.driver:
+                    return
+                
+                if GraphDatabase._shared_driver is None:
+                    driver = AsyncGraphDatabase.driver(
+                        self.uri,
+                        auth=self.auth,
+                        max_connection_pool_size=settings.neo4j_max_connection_pool_size,
+                        connection_acquisition_timeout=settings.neo4j_connection_acquisition_timeout,
+                        max_connection_lifetime=settings.neo4j_max_connection_lifetime,
+                        keep_alive=True,
+                    )
+                    try:
+                        # Test connection
+                        await driver.verify_connectivity()
+                    except Exception:
+                        await driver.close()
+                        raise
+                    GraphDatabase._shared_driver = driver
+                    logger.info("Connected to Neo4j database")
+                
+                self.driver = GraphDatabase._shared_driver
+                GraphDatabase._shared_driver_users += 1
         except Exception as e:
             logger.error(f"Failed to connect to Neo4j: {e}")
             raise
     
     async def close(self):
         """Close Neo4j connection."""
-        if self.driver:
-            await self.driver.close()
-            logger.info("Neo4j connection closed")
+        async with GraphDatabase._driver_lock:
+            if not self.driver:
+                return
+            
+            self.driver = None
+            GraphDatabase._shared_driver_users -= 1
+            
+            # Only close the shared driver once its last user is done
+            if GraphDatabase._shared_driver_users == 0:
+                await GraphDatabase._shared_driver.close()
+                GraphDatabase._shared_driver = None
+                logger.info("Neo4j connection closed")
     
     @asynccontextmanager
     async def get_session(self) -> AsyncSession:
@@ -44,24 +86,64 @@ class GraphDatabase:
         if not self.driver:
             await self.connect()
         
-        async with self.driver.session() as session:
+        async with self.driver.session(database=self.database) as session:
             try:
                 yield session
             except Exception as e:
                 logger.error(f"Neo4j session error: {e}")
                 raise
     
+    @staticmethod
+    async def _fetch_records(tx: AsyncManagedTransaction, query: str, parameters: Dict[str, Any]) -> List[Dict]:
+        """Run a query inside a managed transaction and consume its records."""
+        result = await tx.run(query, parameters)
+        return [record.data() async for record in result]
+    
     async def execute_query(self, query: str, parameters: Dict[str, Any] = None) -> List[Dict]:
         """Execute a Cypher query and return results."""
+        # Arbitrary Cypher runs as an auto-commit transaction, which works for
+        # write procedures and CALL { ... } IN TRANSACTIONS
         async with self.get_session() as session:
             result = await session.run(query, parameters or {})
             return [record.data() async for record in result]
     
+    async def execute_read_query(self, query: str, parameters: Dict[str, Any] = None) -> List[Dict]:
+        """Execute a known read-only query in a managed read transaction."""
+        # Managed transactions are retried by the driver on transient errors
+        async with self.get_session() as session:
+            return await session.execute_read(self._fetch_records, query, parameters or {})
+    
     async def execute_write_query(self, query: str, parameters: Dict[str, Any] = None) -> List[Dict]:
         """Execute a write query in a transaction."""
+        async with self.get_session() as session:
+            return await session.execute_write(self._fetch_records, query, parameters or {})
+    
+    async def stream_query(
+        self,
+        query: str,
+        parameters: Dict[str, Any] = None
+    ) -> AsyncIterator[Record]:
+        """Execute a read query and yield records as they arrive."""
         async with self.get_session() as session:
             result = await session.run(query, parameters or {})
-            return [record.data() async for record in result]
+            async for record in result:
+                yield record
+    
+    async def execute_scalar(
+        self,
+        query: str,
+        parameters: Dict[str, Any] = None,
+        key: str = "count",
+        default: Any = 0
+    ) -> Any:
+        """Execute a read query and return one value from its single result row."""
+        async def read_value(tx: AsyncManagedTransaction) -> Any:
+            result = await tx.run(query, parameters or {})
+            record = await result.single()
+            return record[key] if record else default
+        
+        async with self.get_session() as session:
+            return await session.execute_read(read_value)
     
     # Schema initialization
     async def create_schema(self):
@@ -119,7 +201,7 @@ class GraphDatabase:
                collect(DISTINCT {service: s.name, strength: r.strength, count: r.count}) as preferred_services,
                collect(DISTINCT {service: srv.name, date: a.start_time, satisfaction: b.satisfaction}) as booking_history
         """
-        result = await self.execute_query(query, {"customer_id": customer_id})
+        result = await self.execute_read_query(query, {"customer_id": customer_id})
         return result[0] if result else {}
     
     async def update_customer_preferences(self, customer_id: str, service_id: str, satisfaction: float = 1.0):
@@ -171,7 +253,7 @@ class GraphDatabase:
         ORDER BY score DESC
         LIMIT $limit
         """
-        return await self.execute_query(query, {"customer_id": customer_id, "limit": limit})
+        return await self.execute_read_query(query, {"customer_id": customer_id, "limit": limit})
     
     async def get_staff_recommendations(self, service_id: str, customer_id: str) -> List[Dict]:
         """Get staff recommendations based on specializations and customer history."""
@@ -188,7 +270,7 @@ class GraphDatabase:
                COALESCE(worked.satisfaction, 0) + COALESCE(specializes.expertise_level, 1) as total_score
         ORDER BY total_score DESC
         """
-        return await self.execute_query(query, {"service_id": service_id, "customer_id": customer_id})
+        return await self.execute_read_query(query, {"service_id": service_id, "customer_id": customer_id})
     
     # Service relationships
     async def create_service_relationships(self, service_data: List[Dict]):
@@ -335,7 +417,7 @@ class GraphDatabase:
             END DESC
         LIMIT 10
         """
-        return await self.execute_query(cypher_query, {"query": query})
+        return await self.execute_read_query(cypher_query, {"query": query})
     
     # Analytics and insights
     async def get_customer_analytics(self, customer_id: str) -> Dict:
@@ -366,7 +448,7 @@ class GraphDatabase:
             booking_frequency: size(appointment_times)
         } as analytics
         """
-        result = await self.execute_query(query, {"customer_id": customer_id})
+        result = await self.execute_read_query(query, {"customer_id": customer_id})
         return result[0]["analytics"] if result else {}
     
     async def get_business_insights(self) -> Dict:
@@ -401,7 +483,7 @@ class GraphDatabase:
             customer_segments: collect({category: category, customers: customers})
         } as insights
         """
-        result = await self.execute_query(query)
+        result = await self.execute_read_query(query)
         return result[0]["insights"] if result else {}
     
     # Health check
@@ -0,0 +1,22 @@
+"""Redis connection pool and client management."""
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+
+# One connection pool shared by every Redis client in the process. The
+# blocking pool makes callers wait for a free connection when it is
+# exhausted instead of failing with "Too many connections"
+redis_pool = aioredis.BlockingConnectionPool.from_url(
+    settings.redis_url,
+    decode_responses=True,
+    max_connections=settings.redis_max_connections,
+)
+
+redis_client = aioredis.Redis(connection_pool=redis_pool)
+
+
+async def close_redis():
+    """Disconnect every pooled Redis connection."""
+    await redis_pool.disconnect()
@@ -7,29 +7,146 @@ This script loads spa-related information into ChromaDB for RAG (Retrieval-Augme
 import json
 import chromadb
 from chromadb.config import Settings
+from requests.adapters import HTTPAdapter
 import logging
-from typing import List, Dict, Any
-import uuid
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+import hashlib
+from collections import Counter
 from datetime import datetime
 import asyncio
 import sys
 import os
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
 # Add the app directory to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), '.'))
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Knowledge base sections: (JSON key, document type)
+SECTIONS = (
+    ("spa_services", "service"),
+    ("spa_policies", "policy"),
+    ("spa_facilities", "facility"),
+    ("spa_packages", "package"),
+    ("frequently_asked_questions", "faq"),
+    ("spa_tips_and_advice", "tip"),
+)
+
+# Metadata shared by every record of a section. Only filterable fields are
+# stored as metadata; titles, prices, etc. stay searchable in the document
+_SECTION_METADATA = {
+    source: {"type": doc_type, "source": source}
+    for source, doc_type in SECTIONS
+}
+
+# Decimal places kept when serializing embeddings for upload
+EMBEDDING_DECIMALS = 5
+
+# Document layout per type: (label, key, is list, omitted when empty)
+_DOCUMENT_FIELDS = {
+    "service": (
+        ("Service", "title", False, False),
+        ("Category", "category", False, False),
+        ("Description", "description", False, False),
+        ("Duration", "duration", False, False),
+        ("Price", "price", False, False),
+        ("Benefits", "benefits", True, True),
+        ("Preparation", "preparation", False, True),
+        ("Contraindications", "contraindications", True, True),
+    ),
+    "policy": (
+        ("Policy", "title", False, False),
+        ("Category", "category", False, False),
+        ("Content", "content", False, False),
+    ),
+    "facility": (
+        ("Facility", "title", False, False),
+        ("Category", "category", False, False),
+        ("Description", "description", False, False),
+    ),
+    "package": (
+        ("Package", "title", False, False),
+        ("Category", "category", False, False),
+        ("Description", "description", False, False),
+        ("Duration", "duration", False, False),
+        ("Price", "price", False, False),
+        ("Includes", "includes", True, True),
+    ),
+    "faq": (
+        ("FAQ", "question", False, False),
+        ("Category", "category", False, False),
+        ("Answer", "answer", False, False),
+    ),
+    "tip": (
+        ("Tip", "title", False, False),
+        ("Category", "category", False, False),
+        ("Content", "content", False, False),
+    ),
+}
+
+def _format_record(record: Dict[str, Any], doc_type: str) -> str:
+    """Format a knowledge base record into a searchable document."""
+    return "\n".join(
+        f"{label}: {', '.join(record[key]) if is_list else record.get(key, '')}"
+        for label, key, is_list, optional in _DOCUMENT_FIELDS[doc_type]
+        if not optional or record.get(key)
+    )
+
 class SpaKnowledgeBasePopulator:
     """Populate ChromaDB with spa knowledge base data."""
     
-    def __init__(self, host: str = "localhost", port: int = 8001):
-        """Initialize the ChromaDB client."""
-        self.client = chromadb.HttpClient(host=host, port=port)
+    def __init__(self, host: str = "localhost", port: int = 8001, embedding_model: Optional[str] = "all-MiniLM-L6-v2",
+                 persist_path: Optional[str] = None):
+        """Initialize the ChromaDB client and the local embedding model."""
+        # Telemetry fires an extra network call per operation; skip it for bulk loads
+        client_settings = Settings(anonymized_telemetry=False)
+        
+        if persist_path:
+            # Write straight to the local data directory, bypassing HTTP
+            self.client = chromadb.PersistentClient(path=persist_path, settings=client_settings)
+            logger.info(f"Using local ChromaDB at {persist_path}")
+        else:
+            self.client = chromadb.HttpClient(host=host, port=port, settings=client_settings)
+            self._configure_http_pool()
         self.collection_name = "spa_knowledge_base"
         self.collection = None
         
+        # Embed locally in batches when sentence-transformers is available;
+        # otherwise Chroma embeds the documents itself
+        self.embedding_model = None
+        if SentenceTransformer and embedding_model:
+            self.embedding_model = SentenceTransformer(embedding_model)
+            logger.info(f"Loaded embedding model: {embedding_model}")
+        
+    def _configure_http_pool(self, pool_size: int = 32):
+        """Enlarge the HTTP connection pool shared by concurrent batch uploads."""
+        # The HTTP client keeps a requests.Session on its server API; the
+        # default adapter only pools 10 connections
+        session = getattr(getattr(self.client, "_server", None), "_session", None)
+        if session is None:
+            logger.warning("ChromaDB client exposes no HTTP session; using default connection pool")
+            return
+        
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=3)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+    
     def setup_collection(self):
         """Create or get the ChromaDB collection."""
         try:
@@ -47,200 +164,187 @@ class SpaKnowledgeBasePopulator:
     def load_spa_data(self, file_path: str) -> Dict[str, Any]:
         """Load spa data from JSON file."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            if orjson is not None:
+                with open(file_path, 'rb') as f:
+                    data = orjson.loads(f.read())
+            else:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
             logger.info(f"Loaded spa data from {file_path}")
             return data
         except Exception as e:
             logger.error(f"Error loading spa data: {e}")
             raise
     
-    def prepare_documents(self, spa_data: Dict[str, Any]) -> tuple:
-        """Prepare documents, metadata, and IDs for ChromaDB."""
-        documents = []
-        metadatas = []
-        ids = []
-        
-        # Process spa services
-        for service in spa_data.get("spa_services", []):
-            doc_text = self._format_service_document(service)
-            documents.append(doc_text)
-            metadatas.append({
-                "category": service.get("category", "Unknown"),
-                "type": "service",
-                "title": service.get("title", ""),
-                "duration": service.get("duration", ""),
-                "price": service.get("price", ""),
-                "source": "spa_services"
-            })
-            ids.append(service.get("id", str(uuid.uuid4())))
-        
-        # Process spa policies
-        for policy in spa_data.get("spa_policies", []):
-            doc_text = self._format_policy_document(policy)
-            documents.append(doc_text)
-            metadatas.append({
-                "category": policy.get("category", "Unknown"),
-                "type": "policy",
-                "title": policy.get("title", ""),
-                "source": "spa_policies"
-            })
-            ids.append(policy.get("id", str(uuid.uuid4())))
-        
-        # Process spa facilities
-        for facility in spa_data.get("spa_facilities", []):
-            doc_text = self._format_facility_document(facility)
-            documents.append(doc_text)
-            metadatas.append({
-                "category": facility.get("category", "Unknown"),
-                "type": "facility",
-                "title": facility.get("title", ""),
-                "source": "spa_facilities"
-            })
-            ids.append(facility.get("id", str(uuid.uuid4())))
-        
-        # Process spa packages
-        for package in spa_data.get("spa_packages", []):
-            doc_text = self._format_package_document(package)
-            documents.append(doc_text)
-            metadatas.append({
-                "category": package.get("category", "Unknown"),
-                "type": "package",
-                "title": package.get("title", ""),
-                "duration": package.get("duration", ""),
-                "price": package.get("price", ""),
-                "source": "spa_packages"
-            })
-            ids.append(package.get("id", str(uuid.uuid4())))
-        
-        # Process FAQs
-        for faq in spa_data.get("frequently_asked_questions", []):
-            doc_text = self._format_faq_document(faq)
-            documents.append(doc_text)
-            metadatas.append({
-                "category": faq.get("category", "Unknown"),
-                "type": "faq",
-                "question": faq.get("question", ""),
-                "source": "frequently_asked_questions"
-            })
-            ids.append(faq.get("id", str(uuid.uuid4())))
-        
-        # Process tips and advice
-        for tip in spa_data.get("spa_tips_and_advice", []):
-            doc_text = self._format_tip_document(tip)
-            documents.append(doc_text)
-            metadatas.append({
-                "category": tip.get("category", "Unknown"),
-                "type": "tip",
-                "title": tip.get("title", ""),
-                "source": "spa_tips_and_advice"
-            })
-            ids.append(tip.get("id", str(uuid.uuid4())))
-        
-        return documents, metadatas, ids
-    
-    def _format_service_document(self, service: Dict[str, Any]) -> str:
-        """Format service data into a searchable document."""
-        doc_parts = [
-            f"Service: {service.get('title', '')}",
-            f"Category: {service.get('category', '')}",
-            f"Description: {service.get('description', '')}",
-            f"Duration: {service.get('duration', '')}",
-            f"Price: {service.get('price', '')}",
-        ]
-        
-        if service.get('benefits'):
-            doc_parts.append(f"Benefits: {', '.join(service['benefits'])}")
+    def iter_records(self, file_path: str) -> Iterator[Tuple[str, Dict, str]]:
+        """Stream (document, metadata, id) records from the spa data file."""
+        if ijson is None:
+            # Fall back to loading the whole file into memory
+            documents, metadatas, ids = self.prepare_documents(self.load_spa_data(file_path))
+            yield from zip(documents, metadatas, ids)
+            return
         
-        if service.get('preparation'):
-            doc_parts.append(f"Preparation: {service['preparation']}")
+        doc_types = dict(SECTIONS)
+        item_sources = {f"{source}.item": source for source in doc_types}
         
-        if service.get('contraindications'):
-            doc_parts.append(f"Contraindications: {', '.join(service['contraindications'])}")
-        
-        return "\n".join(doc_parts)
-    
-    def _format_policy_document(self, policy: Dict[str, Any]) -> str:
-        """Format policy data into a searchable document."""
-        return f"Policy: {policy.get('title', '')}\nCategory: {policy.get('category', '')}\nContent: {policy.get('content', '')}"
-    
-    def _format_facility_document(self, facility: Dict[str, Any]) -> str:
-        """Format facility data into a searchable document."""
-        return f"Facility: {facility.get('title', '')}\nCategory: {facility.get('category', '')}\nDescription: {facility.get('description', '')}"
+        # Walk the parse events in a single pass and build each section's
+        # records as they complete, rather than re-reading the file per section
+        with open(file_path, 'rb') as f:
+            item_prefix = source = builder = None
+            for prefix, event, value in ijson.parse(f, use_float=True):
+                if builder is None:
+                    if event == "start_map" and prefix in item_sources:
+                        item_prefix, source = prefix, item_sources[prefix]
+                        builder = ijson.ObjectBuilder()
+                        builder.event(event, value)
+                    continue
+                
+                builder.event(event, value)
+                if event == "end_map" and prefix == item_prefix:
+                    yield self._prepare_record(builder.value, source, doc_types[source])
+                    builder = None
+        logger.info(f"Streamed spa data from {file_path}")
     
-    def _format_package_document(self, package: Dict[str, Any]) -> str:
-        """Format package data into a searchable document."""
-        doc_parts = [
-            f"Package: {package.get('title', '')}",
-            f"Category: {package.get('category', '')}",
-            f"Description: {package.get('description', '')}",
-            f"Duration: {package.get('duration', '')}",
-            f"Price: {package.get('price', '')}",
-        ]
+    def prepare_documents(self, spa_data: Dict[str, Any]) -> tuple:
+        """Prepare documents, metadata, and IDs for ChromaDB."""
+        # Totals are known up front, so allocate once and fill by index
+        total = sum(len(spa_data.get(source, [])) for source, _ in SECTIONS)
+        documents = [None] * total
+        metadatas = [None] * total
+        ids = [None] * total
         
-        if package.get('includes'):
-            doc_parts.append(f"Includes: {', '.join(package['includes'])}")
+        i = 0
+        for source, doc_type in SECTIONS:
+            for record in spa_data.get(source, []):
+                documents[i], metadatas[i], ids[i] = self._prepare_record(record, source, doc_type)
+                i += 1
         
-        return "\n".join(doc_parts)
-    
-    def _format_faq_document(self, faq: Dict[str, Any]) -> str:
-        """Format FAQ data into a searchable document."""
-        return f"FAQ: {faq.get('question', '')}\nCategory: {faq.get('category', '')}\nAnswer: {faq.get('answer', '')}"
+        return documents, metadatas, ids
     
-    def _format_tip_document(self, tip: Dict[str, Any]) -> str:
-        """Format tip data into a searchable document."""
-        return f"Tip: {tip.get('title', '')}\nCategory: {tip.get('category', '')}\nContent: {tip.get('content', '')}"
+    def _prepare_record(self, record: Dict[str, Any], source: str, doc_type: str) -> Tuple[str, Dict, str]:
+        """Build the document text, metadata, and ID for a single record."""
+        metadata = {
+            **_SECTION_METADATA[source],
+            "category": record.get("category", "Unknown")
+        }
+        document = _format_record(record, doc_type)
+        # Content-hash fallback keeps IDs stable across reruns
+        doc_id = record.get("id") or hashlib.sha256(document.encode("utf-8")).hexdigest()
+        return document, metadata, doc_id
     
-    def populate_collection(self, documents: List[str], metadatas: List[Dict], ids: List[str]):
-        """Populate the ChromaDB collection with documents."""
+    async def populate_collection(self, records: Iterable[Tuple[str, Dict, str]], max_concurrency: int = 8):
+        """Populate the ChromaDB collection with (document, metadata, id) records."""
         try:
             # Add documents in batches to avoid memory issues
             batch_size = 100
-            total_docs = len(documents)
+            total_docs = 0
+            
+            # Bound in-flight uploads so the server isn't overwhelmed; this
+            # also caps how many batches are held in memory at once
+            semaphore = asyncio.Semaphore(max_concurrency)
+            encode_lock = asyncio.Lock()
+            batch_count = 0
+            
+            async def add_batch(batch_number: int, batch: List[Tuple[str, Dict, str]]):
+                try:
+                    batch_docs, batch_metadata, batch_ids = (list(column) for column in zip(*batch))
+                    
+                    embeddings = {}
+                    if self.embedding_model is not None:
+                        # Encode one batch at a time while earlier batches upload
+                        async with encode_lock:
+                            embeddings["embeddings"] = await asyncio.to_thread(self.embed_documents, batch_docs)
+                    
+                    # Upsert so reruns update records instead of duplicating them
+                    await asyncio.to_thread(
+                        self.collection.upsert,
+                        documents=batch_docs,
+                        metadatas=batch_metadata,
+                        ids=batch_ids,
+                        **embeddings
+                    )
+                    logger.info(f"Added batch {batch_number}: {len(batch_docs)} documents")
+                finally:
+                    semaphore.release()
             
-            for i in range(0, total_docs, batch_size):
-                batch_docs = documents[i:i+batch_size]
-                batch_metadata = metadatas[i:i+batch_size]
-                batch_ids = ids[i:i+batch_size]
+            # The first failed upload cancels the others, and the producer too
+            # while it waits for a free upload slot, so reading stops early
+            async with asyncio.TaskGroup() as tg:
+                async def flush(batch: List[Tuple[str, Dict, str]]):
+                    nonlocal batch_count
+                    await semaphore.acquire()
+                    batch_count += 1
+                    tg.create_task(add_batch(batch_count, batch))
                 
-                self.collection.add(
-                    documents=batch_docs,
-                    metadatas=batch_metadata,
-                    ids=batch_ids
-                )
+                # Records without an id and with identical text hash to the same
+                # id; upsert rejects repeated ids within a call, so keep the first
+                seen_ids = set()
+                duplicates = 0
+                batch = []
+                for record in records:
+                    doc_id = record[2]
+                    if doc_id in seen_ids:
+                        duplicates += 1
+                        continue
+                    seen_ids.add(doc_id)
+                    batch.append(record)
+                    total_docs += 1
+                    if len(batch) == batch_size:
+                        await flush(batch)
+                        batch = []
                 
-                logger.info(f"Added batch {i//batch_size + 1}: {len(batch_docs)} documents")
+                if batch:
+                    await flush(batch)
             
+            if duplicates:
+                logger.info(f"Skipped {duplicates} duplicate records")
             logger.info(f"Successfully populated collection with {total_docs} documents")
             
+        except ExceptionGroup as eg:
+            # Surface the upload error itself rather than the TaskGroup wrapper
+            error = eg.exceptions[0]
+            logger.error(f"Error populating collection: {error}")
+            raise error from eg
         except Exception as e:
             logger.error(f"Error populating collection: {e}")
             raise
     
-    def verify_population(self) -> Dict[str, Any]:
+    def embed_documents(self, documents: List[str]) -> List[List[float]]:
+        """Embed documents locally with the sentence-transformers model."""
+        embeddings = self.embedding_model.encode(
+            documents,
+            batch_size=128,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+        # float32 values serialize to ~18 JSON digits each; rounding the
+        # normalized vectors shrinks the request body with negligible loss
+        return embeddings.astype("float64").round(EMBEDDING_DECIMALS).tolist()
+    
+    def verify_population(self, page_size: int = 10000) -> Dict[str, Any]:
         """Verify that the data was populated correctly."""
         try:
-            # Get collection info
-            collection_info = self.collection.get()
-            total_count = len(collection_info['ids'])
-            
-            # Count by type
-            type_counts = {}
-            for metadata in collection_info['metadatas']:
-                doc_type = metadata.get('type', 'unknown')
-                type_counts[doc_type] = type_counts.get(doc_type, 0) + 1
+            # Let the server count, then page through metadata only
+            total_count = self.collection.count()
+            type_counts = Counter()
+            category_counts = Counter()
+            sample_ids = []
             
-            # Count by category
-            category_counts = {}
-            for metadata in collection_info['metadatas']:
-                category = metadata.get('category', 'unknown')
-                category_counts[category] = category_counts.get(category, 0) + 1
+            for offset in range(0, total_count, page_size):
+                page = self.collection.get(limit=page_size, offset=offset, include=["metadatas"])
+                if not sample_ids:
+                    sample_ids = page['ids'][:5]  # First 5 IDs
+                
+                # Count by type and category in a single pass
+                for metadata in page['metadatas']:
+                    type_counts[metadata.get('type', 'unknown')] += 1
+                    category_counts[metadata.get('category', 'unknown')] += 1
             
             verification_result = {
                 'total_documents': total_count,
-                'types': type_counts,
-                'categories': category_counts,
-                'sample_ids': collection_info['ids'][:5]  # First 5 IDs
+                'types': dict(type_counts),
+                'categories': dict(category_counts),
+                'sample_ids': sample_ids
             }
             
             logger.info(f"Verification complete: {verification_result}")
@@ -281,20 +385,17 @@ class SpaKnowledgeBasePopulator:
 def main():
     """Main function to populate ChromaDB with spa data."""
     try:
-        # Initialize populator
-        populator = SpaKnowledgeBasePopulator()
+        # Initialize populator (set CHROMA_PERSIST_PATH to ingest locally)
+        populator = SpaKnowledgeBasePopulator(persist_path=os.getenv("CHROMA_PERSIST_PATH"))
         
         # Setup collection
         populator.setup_collection()
         
-        # Load spa data
-        spa_data = populator.load_spa_data("spa_knowledge_base.json")
-        
-        # Prepare documents
-        documents, metadatas, ids = populator.prepare_documents(spa_data)
+        # Stream prepared records from the spa data file
+        records = populator.iter_records("spa_knowledge_base.json")
         
         # Populate collection
-        populator.populate_collection(documents, metadatas, ids)
+        asyncio.run(populator.populate_collection(records))
         
         # Verify population
         verification = populator.verify_population()
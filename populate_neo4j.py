@@ -7,26 +7,60 @@ This script creates nodes and relationships for spa services, staff, customers,
 import json
 import asyncio
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Any, Tuple
 import sys
 import os
 
 # Add the app directory to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), '.'))
 
+from neo4j import AsyncManagedTransaction
+
 from app.core.graph_db import GraphDatabase
 from app.core.config import settings
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Sample spa data used to seed the graph, kept as JSON under seed/
+SEED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "seed")
+
+def _load_seed(name: str) -> List[Dict[str, Any]]:
+    """Load one seed data file from the seed directory."""
+    with open(os.path.join(SEED_DIR, f"{name}.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+SERVICE_CATEGORIES = _load_seed("service_categories")
+SERVICES = _load_seed("services")
+STAFF_MEMBERS = _load_seed("staff")
+CUSTOMERS = _load_seed("customers")
+SERVICE_RELATIONSHIPS = _load_seed("service_relationships")
+APPOINTMENTS = _load_seed("appointments")
+
+# Relationship types allowed between services; they are interpolated into Cypher
+SERVICE_RELATIONSHIP_TYPES = ("COMPLEMENTS", "ALTERNATIVE", "SEQUENTIAL")
+
+def _property_rows(records: List[Dict[str, Any]], key: str, exclude: Tuple[str, ...] = ()) -> List[Dict[str, Any]]:
+    """Split seed records into their MERGE key and a property map for `SET n += row.props`."""
+    return [
+        {
+            key: record[key],
+            "props": {k: v for k, v in record.items() if k != key and k not in exclude}
+        }
+        for record in records
+    ]
+
 class SpaGraphPopulator:
     """Populate Neo4j graph database with spa data."""
     
     def __init__(self):
         """Initialize the Neo4j graph database connection."""
         self.graph_db = GraphDatabase()
+        # One creation timestamp per run, sent as a parameter instead of
+        # evaluating datetime() for every MERGEd row
+        self.created_at = datetime.now(timezone.utc)
         
     async def connect(self):
         """Connect to Neo4j database."""
@@ -38,564 +72,260 @@ class SpaGraphPopulator:
         await self.graph_db.close()
         logger.info("Closed Neo4j database connection")
         
-    async def clear_database(self):
+    async def clear_database(self, tx: AsyncManagedTransaction):
         """Clear all nodes and relationships (for development)."""
         query = "MATCH (n) DETACH DELETE n"
-        await self.graph_db.execute_query(query)
+        await tx.run(query)
         logger.info("Cleared all nodes and relationships")
         
-    async def create_service_categories(self):
+    async def create_service_categories(self, tx: AsyncManagedTransaction):
         """Create service category nodes."""
-        categories = [
-            {
-                "name": "Massage Therapy",
-                "description": "Various massage treatments for relaxation and therapeutic benefits",
-                "color": "#4CAF50"
-            },
-            {
-                "name": "Facial Treatments",
-                "description": "Skincare treatments for face and neck area",
-                "color": "#FF9800"
-            },
-            {
-                "name": "Body Treatments",
-                "description": "Full body treatments including scrubs and wraps",
-                "color": "#9C27B0"
-            },
-            {
-                "name": "Wellness Treatments",
-                "description": "Holistic wellness and mental health treatments",
-                "color": "#2196F3"
-            },
-            {
-                "name": "Spa Packages",
-                "description": "Combined treatment packages for complete spa experience",
-                "color": "#FF5722"
-            }
-        ]
-        
-        for category in categories:
-            query = """
-            MERGE (c:ServiceCategory {name: $name})
-            ON CREATE SET c.description = $description,
-                         c.color = $color,
-                         c.created_at = datetime()
-            """
-            await self.graph_db.execute_query(query, category)
-            logger.info(f"Created service category: {category['name']}")
+        query = """
+        UNWIND $rows AS row
+        MERGE (c:ServiceCategory {name: row.name})
+        ON CREATE SET c += row.props,
+                     c.created_at = $now
+        """
+        await tx.run(query, {
+            "rows": _property_rows(SERVICE_CATEGORIES, "name"),
+            "now": self.created_at
+        })
+        logger.info("Created %d service categories", len(SERVICE_CATEGORIES))
             
-    async def create_services(self):
+    async def create_service_nodes(self, tx: AsyncManagedTransaction):
         """Create service nodes with properties."""
-        services = [
-            {
-                "id": "massage-001",
-                "name": "Swedish Massage",
-                "category": "Massage Therapy",
-                "description": "Classic full-body massage for relaxation",
-                "duration": 60,
-                "price": 120.0,
-                "difficulty": "easy",
-                "popularity": 0.9,
-                "benefits": ["stress_reduction", "improved_circulation", "muscle_relaxation"],
-                "contraindications": ["recent_surgery", "severe_inflammation"]
-            },
-            {
-                "id": "massage-002",
-                "name": "Deep Tissue Massage",
-                "category": "Massage Therapy",
-                "description": "Therapeutic massage for muscle knots and tension",
-                "duration": 75,
-                "price": 150.0,
-                "difficulty": "advanced",
-                "popularity": 0.8,
-                "benefits": ["pain_relief", "muscle_knot_removal", "improved_mobility"],
-                "contraindications": ["blood_clots", "recent_injuries"]
-            },
-            {
-                "id": "massage-003",
-                "name": "Hot Stone Massage",
-                "category": "Massage Therapy",
-                "description": "Relaxing massage with heated stones",
-                "duration": 90,
-                "price": 180.0,
-                "difficulty": "intermediate",
-                "popularity": 0.7,
-                "benefits": ["deep_relaxation", "improved_circulation", "stress_relief"],
-                "contraindications": ["pregnancy", "diabetes", "high_blood_pressure"]
-            },
-            {
-                "id": "facial-001",
-                "name": "Signature Hydrating Facial",
-                "category": "Facial Treatments",
-                "description": "Customized facial for skin hydration",
-                "duration": 60,
-                "price": 100.0,
-                "difficulty": "easy",
-                "popularity": 0.8,
-                "benefits": ["deep_cleansing", "hydration", "improved_skin_texture"],
-                "contraindications": ["active_acne_treatment", "recent_chemical_peels"]
-            },
-            {
-                "id": "facial-002",
-                "name": "Anti-Aging Facial",
-                "category": "Facial Treatments",
-                "description": "Advanced facial targeting signs of aging",
-                "duration": 75,
-                "price": 150.0,
-                "difficulty": "advanced",
-                "popularity": 0.6,
-                "benefits": ["reduced_fine_lines", "improved_skin_elasticity", "brighter_complexion"],
-                "contraindications": ["pregnancy", "active_skin_conditions"]
-            },
-            {
-                "id": "body-001",
-                "name": "Full Body Scrub",
-                "category": "Body Treatments",
-                "description": "Exfoliating treatment for smooth skin",
-                "duration": 45,
-                "price": 80.0,
-                "difficulty": "easy",
-                "popularity": 0.7,
-                "benefits": ["smooth_skin", "improved_texture", "enhanced_circulation"],
-                "contraindications": ["sunburn", "open_wounds"]
-            },
-            {
-                "id": "body-002",
-                "name": "Detox Body Wrap",
-                "category": "Body Treatments",
-                "description": "Purifying treatment for detoxification",
-                "duration": 60,
-                "price": 120.0,
-                "difficulty": "intermediate",
-                "popularity": 0.5,
-                "benefits": ["detoxification", "skin_tightening", "improved_circulation"],
-                "contraindications": ["pregnancy", "high_blood_pressure", "claustrophobia"]
-            },
-            {
-                "id": "wellness-001",
-                "name": "Aromatherapy Session",
-                "category": "Wellness Treatments",
-                "description": "Essential oil therapy for well-being",
-                "duration": 30,
-                "price": 60.0,
-                "difficulty": "easy",
-                "popularity": 0.6,
-                "benefits": ["stress_reduction", "mood_enhancement", "better_sleep"],
-                "contraindications": ["severe_allergies", "asthma"]
-            },
-            {
-                "id": "wellness-002",
-                "name": "Meditation Session",
-                "category": "Wellness Treatments",
-                "description": "Guided meditation for mental well-being",
-                "duration": 45,
-                "price": 70.0,
-                "difficulty": "easy",
-                "popularity": 0.4,
-                "benefits": ["stress_reduction", "mental_clarity", "improved_focus"],
-                "contraindications": ["severe_mental_health_conditions"]
-            }
-        ]
+        query = """
+        UNWIND $rows AS row
+        MERGE (s:Service {id: row.id})
+        ON CREATE SET s += row.props,
+                     s.created_at = $now
+        """
+        # The category is stored as a BELONGS_TO relationship, not a property
+        await tx.run(query, {
+            "rows": _property_rows(SERVICES, "id", exclude=("category",)),
+            "now": self.created_at
+        })
+        logger.info("Created %d services", len(SERVICES))
         
-        for service in services:
-            query = """
-            MERGE (s:Service {id: $id})
-            ON CREATE SET s.name = $name,
-                         s.description = $description,
-                         s.duration = $duration,
-                         s.price = $price,
-                         s.difficulty = $difficulty,
-                         s.popularity = $popularity,
-                         s.benefits = $benefits,
-                         s.contraindications = $contraindications,
-                         s.created_at = datetime()
-            """
-            await self.graph_db.execute_query(query, service)
-            
-            # Create relationship to category
-            category_query = """
-            MATCH (s:Service {id: $service_id})
-            MATCH (c:ServiceCategory {name: $category})
-            MERGE (s)-[:BELONGS_TO]->(c)
-            """
-            await self.graph_db.execute_query(category_query, {
-                "service_id": service["id"],
-                "category": service["category"]
-            })
-            
-            logger.info(f"Created service: {service['name']}")
-            
-    async def create_staff_members(self):
-        """Create staff nodes with specializations."""
-        staff_members = [
-            {
-                "id": "staff-001",
-                "name": "Sarah Thompson",
-                "email": "sarah.thompson@spa.com",
-                "role": "Senior Massage Therapist",
-                "experience_years": 8,
-                "specializations": ["Swedish Massage", "Deep Tissue Massage", "Hot Stone Massage"],
-                "certifications": ["Licensed Massage Therapist", "Deep Tissue Specialist"],
-                "rating": 4.9,
-                "availability_hours": 40
-            },
-            {
-                "id": "staff-002",
-                "name": "Michael Chen",
-                "email": "michael.chen@spa.com",
-                "role": "Massage Therapist",
-                "experience_years": 5,
-                "specializations": ["Swedish Massage", "Aromatherapy Session"],
-                "certifications": ["Licensed Massage Therapist", "Aromatherapy Certified"],
-                "rating": 4.7,
-                "availability_hours": 35
-            },
-            {
-                "id": "staff-003",
-                "name": "Emma Rodriguez",
-                "email": "emma.rodriguez@spa.com",
-                "role": "Esthetician",
-                "experience_years": 6,
-                "specializations": ["Signature Hydrating Facial", "Anti-Aging Facial"],
-                "certifications": ["Licensed Esthetician", "Anti-Aging Specialist"],
-                "rating": 4.8,
-                "availability_hours": 38
-            },
-            {
-                "id": "staff-004",
-                "name": "James Wilson",
-                "email": "james.wilson@spa.com",
-                "role": "Body Treatment Specialist",
-                "experience_years": 4,
-                "specializations": ["Full Body Scrub", "Detox Body Wrap"],
-                "certifications": ["Body Treatment Certified"],
-                "rating": 4.6,
-                "availability_hours": 32
-            },
-            {
-                "id": "staff-005",
-                "name": "Lisa Park",
-                "email": "lisa.park@spa.com",
-                "role": "Wellness Coach",
-                "experience_years": 7,
-                "specializations": ["Meditation Session", "Aromatherapy Session"],
-                "certifications": ["Certified Wellness Coach", "Meditation Instructor"],
-                "rating": 4.9,
-                "availability_hours": 30
-            }
-        ]
+    async def create_staff_nodes(self, tx: AsyncManagedTransaction):
+        """Create staff nodes."""
+        query = """
+        UNWIND $rows AS row
+        MERGE (st:Staff {id: row.id})
+        ON CREATE SET st += row.props,
+                     st.created_at = $now
+        """
+        await tx.run(query, {
+            "rows": _property_rows(STAFF_MEMBERS, "id", exclude=("specialization_ids",)),
+            "now": self.created_at
+        })
+        logger.info("Created %d staff members", len(STAFF_MEMBERS))
         
-        for staff in staff_members:
-            query = """
-            MERGE (st:Staff {id: $id})
-            ON CREATE SET st.name = $name,
-                         st.email = $email,
-                         st.role = $role,
-                         st.experience_years = $experience_years,
-                         st.certifications = $certifications,
-                         st.rating = $rating,
-                         st.availability_hours = $availability_hours,
-                         st.created_at = datetime()
-            """
-            await self.graph_db.execute_query(query, staff)
-            
-            # Create relationships to services they can perform
-            for specialization in staff["specializations"]:
-                service_query = """
-                MATCH (st:Staff {id: $staff_id})
-                MATCH (s:Service {name: $service_name})
-                MERGE (st)-[:CAN_PERFORM]->(s)
-                """
-                await self.graph_db.execute_query(service_query, {
-                    "staff_id": staff["id"],
-                    "service_name": specialization
-                })
-            
-            logger.info(f"Created staff member: {staff['name']}")
-            
-    async def create_sample_customers(self):
-        """Create sample customer nodes with preferences."""
-        customers = [
-            {
-                "id": "customer-001",
-                "name": "Alice Johnson",
-                "email": "alice.johnson@email.com",
-                "phone": "+1234567890",
-                "age_group": "30-40",
-                "pressure_preference": "medium",
-                "temperature_preference": "warm",
-                "music_preference": "classical",
-                "aromatherapy_preference": True,
-                "visit_frequency": "monthly",
-                "total_visits": 12,
-                "favorite_services": ["Swedish Massage", "Signature Hydrating Facial"],
-                "budget_range": "medium"
-            },
-            {
-                "id": "customer-002",
-                "name": "Bob Smith",
-                "email": "bob.smith@email.com",
-                "phone": "+1234567891",
-                "age_group": "40-50",
-                "pressure_preference": "firm",
-                "temperature_preference": "hot",
-                "music_preference": "nature_sounds",
-                "aromatherapy_preference": False,
-                "visit_frequency": "weekly",
-                "total_visits": 24,
-                "favorite_services": ["Deep Tissue Massage", "Hot Stone Massage"],
-                "budget_range": "high"
-            },
-            {
-                "id": "customer-003",
-                "name": "Carol Davis",
-                "email": "carol.davis@email.com",
-                "phone": "+1234567892",
-                "age_group": "25-35",
-                "pressure_preference": "light",
-                "temperature_preference": "cool",
-                "music_preference": "ambient",
-                "aromatherapy_preference": True,
-                "visit_frequency": "bi-weekly",
-                "total_visits": 18,
-                "favorite_services": ["Aromatherapy Session", "Meditation Session"],
-                "budget_range": "low"
-            },
-            {
-                "id": "customer-004",
-                "name": "David Wilson",
-                "email": "david.wilson@email.com",
-                "phone": "+1234567893",
-                "age_group": "35-45",
-                "pressure_preference": "medium",
-                "temperature_preference": "warm",
-                "music_preference": "jazz",
-                "aromatherapy_preference": False,
-                "visit_frequency": "monthly",
-                "total_visits": 8,
-                "favorite_services": ["Full Body Scrub", "Swedish Massage"],
-                "budget_range": "medium"
-            },
-            {
-                "id": "customer-005",
-                "name": "Eva Martinez",
-                "email": "eva.martinez@email.com",
-                "phone": "+1234567894",
-                "age_group": "45-55",
-                "pressure_preference": "firm",
-                "temperature_preference": "hot",
-                "music_preference": "classical",
-                "aromatherapy_preference": True,
-                "visit_frequency": "bi-weekly",
-                "total_visits": 15,
-                "favorite_services": ["Anti-Aging Facial", "Detox Body Wrap"],
-                "budget_range": "high"
-            }
-        ]
+    async def create_customer_nodes(self, tx: AsyncManagedTransaction):
+        """Create sample customer nodes."""
+        query = """
+        UNWIND $rows AS row
+        MERGE (c:Customer {id: row.id})
+        ON CREATE SET c += row.props,
+                     c.created_at = $now
+        """
+        await tx.run(query, {
+            "rows": _property_rows(CUSTOMERS, "id", exclude=("favorite_service_ids",)),
+            "now": self.created_at
+        })
+        logger.info("Created %d customers", len(CUSTOMERS))
         
-        for customer in customers:
-            query = """
-            MERGE (c:Customer {id: $id})
-            ON CREATE SET c.name = $name,
-                         c.email = $email,
-                         c.phone = $phone,
-                         c.age_group = $age_group,
-                         c.pressure_preference = $pressure_preference,
-                         c.temperature_preference = $temperature_preference,
-                         c.music_preference = $music_preference,
-                         c.aromatherapy_preference = $aromatherapy_preference,
-                         c.visit_frequency = $visit_frequency,
-                         c.total_visits = $total_visits,
-                         c.budget_range = $budget_range,
-                         c.created_at = datetime()
-            """
-            await self.graph_db.execute_query(query, customer)
-            
-            # Create relationships to favorite services
-            for service_name in customer["favorite_services"]:
-                service_query = """
-                MATCH (c:Customer {id: $customer_id})
-                MATCH (s:Service {name: $service_name})
-                MERGE (c)-[:PREFERS]->(s)
-                """
-                await self.graph_db.execute_query(service_query, {
-                    "customer_id": customer["id"],
-                    "service_name": service_name
-                })
-            
-            logger.info(f"Created customer: {customer['name']}")
-            
-    async def create_service_relationships(self):
+    async def create_service_category_links(self, tx: AsyncManagedTransaction):
+        """Link services to their categories."""
+        query = """
+        UNWIND $rows AS row
+        MATCH (s:Service {id: row.id})
+        MATCH (c:ServiceCategory {name: row.category})
+        MERGE (s)-[:BELONGS_TO]->(c)
+        """
+        await tx.run(query, {"rows": SERVICES})
+        logger.info("Linked %d services to categories", len(SERVICES))
+        
+    async def create_staff_specializations(self, tx: AsyncManagedTransaction):
+        """Link staff to the services they can perform."""
+        query = """
+        UNWIND $rows AS row
+        MATCH (st:Staff {id: row.id})
+        UNWIND row.specialization_ids AS service_id
+        MATCH (s:Service {id: service_id})
+        MERGE (st)-[:CAN_PERFORM]->(s)
+        """
+        await tx.run(query, {"rows": STAFF_MEMBERS})
+        logger.info("Linked %d staff members to their specializations", len(STAFF_MEMBERS))
+        
+    async def create_customer_preferences(self, tx: AsyncManagedTransaction):
+        """Link customers to their favorite services."""
+        query = """
+        UNWIND $rows AS row
+        MATCH (c:Customer {id: row.id})
+        UNWIND row.favorite_service_ids AS service_id
+        MATCH (s:Service {id: service_id})
+        MERGE (c)-[:PREFERS]->(s)
+        """
+        await tx.run(query, {"rows": CUSTOMERS})
+        logger.info("Linked %d customers to their favorite services", len(CUSTOMERS))
+        
+    async def create_service_relationships(self, tx: AsyncManagedTransaction):
         """Create relationships between services (complementary, alternative, etc.)."""
-        relationships = [
-            # Complementary services
-            ("Swedish Massage", "Aromatherapy Session", "COMPLEMENTS", {"strength": 0.8}),
-            ("Deep Tissue Massage", "Hot Stone Massage", "COMPLEMENTS", {"strength": 0.7}),
-            ("Signature Hydrating Facial", "Full Body Scrub", "COMPLEMENTS", {"strength": 0.6}),
-            ("Anti-Aging Facial", "Detox Body Wrap", "COMPLEMENTS", {"strength": 0.5}),
-            ("Meditation Session", "Aromatherapy Session", "COMPLEMENTS", {"strength": 0.9}),
-            
-            # Alternative services (similar benefits)
-            ("Swedish Massage", "Deep Tissue Massage", "ALTERNATIVE", {"strength": 0.6}),
-            ("Signature Hydrating Facial", "Anti-Aging Facial", "ALTERNATIVE", {"strength": 0.7}),
-            ("Full Body Scrub", "Detox Body Wrap", "ALTERNATIVE", {"strength": 0.5}),
-            ("Aromatherapy Session", "Meditation Session", "ALTERNATIVE", {"strength": 0.8}),
-            
-            # Sequential services (good to do together)
-            ("Full Body Scrub", "Swedish Massage", "SEQUENTIAL", {"strength": 0.8}),
-            ("Detox Body Wrap", "Aromatherapy Session", "SEQUENTIAL", {"strength": 0.7}),
-            ("Meditation Session", "Deep Tissue Massage", "SEQUENTIAL", {"strength": 0.6}),
-        ]
+        # Relationship types can't be parameterized, so send one UNWIND per type.
+        # Each type's query text is fixed, so its plan is reused across runs.
+        rows_by_type = defaultdict(list)
+        for row in SERVICE_RELATIONSHIPS:
+            rows_by_type[row["type"]].append(row)
         
-        for service1, service2, relationship, properties in relationships:
+        for relationship, rows in rows_by_type.items():
+            if relationship not in SERVICE_RELATIONSHIP_TYPES:
+                raise ValueError(f"Unknown service relationship type: {relationship}")
             query = f"""
-            MATCH (s1:Service {{name: $service1}})
-            MATCH (s2:Service {{name: $service2}})
+            UNWIND $rows AS row
+            MATCH (s1:Service {{id: row.service1}})
+            MATCH (s2:Service {{id: row.service2}})
             MERGE (s1)-[r:{relationship}]->(s2)
-            ON CREATE SET r += $properties
+            ON CREATE SET r += row.properties
             """
-            await self.graph_db.execute_query(query, {
-                "service1": service1,
-                "service2": service2,
-                "properties": properties
-            })
-            
-            logger.info(f"Created relationship: {service1} -{relationship}-> {service2}")
-            
-    async def create_sample_appointments(self):
-        """Create sample appointment history."""
-        appointments = [
-            {
-                "id": "appt-001",
-                "customer_id": "customer-001",
-                "service_name": "Swedish Massage",
-                "staff_id": "staff-001",
-                "date": "2024-01-15",
-                "status": "completed",
-                "rating": 5,
-                "notes": "Very relaxing, customer loved it"
-            },
-            {
-                "id": "appt-002",
-                "customer_id": "customer-002",
-                "service_name": "Deep Tissue Massage",
-                "staff_id": "staff-001",
-                "date": "2024-01-16",
-                "status": "completed",
-                "rating": 4,
-                "notes": "Good pressure, helped with back pain"
-            },
-            {
-                "id": "appt-003",
-                "customer_id": "customer-003",
-                "service_name": "Aromatherapy Session",
-                "staff_id": "staff-002",
-                "date": "2024-01-17",
-                "status": "completed",
-                "rating": 5,
-                "notes": "Perfect for stress relief"
-            },
-            {
-                "id": "appt-004",
-                "customer_id": "customer-004",
-                "service_name": "Full Body Scrub",
-                "staff_id": "staff-004",
-                "date": "2024-01-18",
-                "status": "completed",
-                "rating": 4,
-                "notes": "Skin feels amazing"
-            },
-            {
-                "id": "appt-005",
-                "customer_id": "customer-005",
-                "service_name": "Anti-Aging Facial",
-                "staff_id": "staff-003",
-                "date": "2024-01-19",
-                "status": "completed",
-                "rating": 5,
-                "notes": "Noticeable improvement in skin texture"
-            }
-        ]
+            await tx.run(query, {"rows": rows})
         
-        for appointment in appointments:
-            query = """
-            MERGE (a:Appointment {id: $id})
-            ON CREATE SET a.date = date($date),
-                         a.status = $status,
-                         a.rating = $rating,
-                         a.notes = $notes,
-                         a.created_at = datetime()
-            """
-            await self.graph_db.execute_query(query, appointment)
-            
-            # Create relationships
-            customer_query = """
-            MATCH (c:Customer {id: $customer_id})
-            MATCH (a:Appointment {id: $appointment_id})
-            MERGE (c)-[:BOOKED]->(a)
-            """
-            await self.graph_db.execute_query(customer_query, {
-                "customer_id": appointment["customer_id"],
-                "appointment_id": appointment["id"]
-            })
-            
-            service_query = """
-            MATCH (s:Service {name: $service_name})
-            MATCH (a:Appointment {id: $appointment_id})
-            MERGE (a)-[:FOR_SERVICE]->(s)
-            """
-            await self.graph_db.execute_query(service_query, {
-                "service_name": appointment["service_name"],
-                "appointment_id": appointment["id"]
-            })
-            
-            staff_query = """
-            MATCH (st:Staff {id: $staff_id})
-            MATCH (a:Appointment {id: $appointment_id})
-            MERGE (st)-[:PERFORMED]->(a)
-            """
-            await self.graph_db.execute_query(staff_query, {
-                "staff_id": appointment["staff_id"],
-                "appointment_id": appointment["id"]
-            })
+        logger.info("Created %d service relationships", len(SERVICE_RELATIONSHIPS))
             
-            logger.info(f"Created appointment: {appointment['id']}")
+    async def create_sample_appointments(self, tx: AsyncManagedTransaction):
+        """Create sample appointment history."""
+        # Create appointments with their customer, service, and staff links in one round-trip
+        query = """
+        UNWIND $rows AS row
+        MERGE (a:Appointment {id: row.id})
+        ON CREATE SET a.date = date(row.date),
+                     a.status = row.status,
+                     a.rating = row.rating,
+                     a.notes = row.notes,
+                     a.created_at = $now
+        WITH a, row
+        MATCH (c:Customer {id: row.customer_id})
+        MATCH (s:Service {id: row.service_id})
+        MATCH (st:Staff {id: row.staff_id})
+        MERGE (c)-[:BOOKED]->(a)
+        MERGE (a)-[:FOR_SERVICE]->(s)
+        MERGE (st)-[:PERFORMED]->(a)
+        """
+        await tx.run(query, {"rows": APPOINTMENTS, "now": self.created_at})
+        logger.info("Created %d appointments", len(APPOINTMENTS))
             
+    async def _write(self, work):
+        """Run a unit of work in its own session and managed write transaction."""
+        # Sessions can't be shared between coroutines, but they all borrow
+        # connections from the same driver pool. Transient errors such as
+        # deadlocks between concurrent writers are retried by the driver.
+        async with self.graph_db.get_session() as session:
+            await session.execute_write(work)
+        
+    async def _write_concurrently(self, *works):
+        """Run independent units of work concurrently, each in its own transaction."""
+        # A TaskGroup cancels the remaining writes as soon as one fails
+        try:
+            async with asyncio.TaskGroup() as tg:
+                for work in works:
+                    tg.create_task(self._write(work))
+        except ExceptionGroup as eg:
+            # Surface the Neo4j error itself rather than the TaskGroup wrapper
+            raise eg.exceptions[0] from eg
+        
+    async def run_all(self):
+        """Create indexes, then clear and repopulate the graph."""
+        self.created_at = datetime.now(timezone.utc)
+        
+        # Indexes first so the lookups during population can use them.
+        # Schema changes can't share a transaction with data writes.
+        logger.info("Creating indexes...")
+        await self.create_indexes()
+        
+        # Clear existing data (development only)
+        logger.info("Clearing existing data...")
+        await self._write(self.clear_database)
+        
+        # Nodes have no dependencies on each other, so create them concurrently
+        logger.info("Creating nodes...")
+        await self._write_concurrently(
+            self.create_service_categories,
+            self.create_service_nodes,
+            self.create_staff_nodes,
+            self.create_customer_nodes,
+        )
+        
+        # Relationships only need the nodes above to exist
+        logger.info("Creating relationships and appointments...")
+        await self._write_concurrently(
+            self.create_service_category_links,
+            self.create_staff_specializations,
+            self.create_customer_preferences,
+            self.create_service_relationships,
+            self.create_sample_appointments,
+        )
+        
     async def create_indexes(self):
-        """Create indexes for better query performance."""
+        """Create indexes and constraints for better query performance."""
         indexes = [
             "CREATE INDEX service_name_idx IF NOT EXISTS FOR (s:Service) ON (s.name)",
-            "CREATE INDEX service_id_idx IF NOT EXISTS FOR (s:Service) ON (s.id)",
-            "CREATE INDEX customer_id_idx IF NOT EXISTS FOR (c:Customer) ON (c.id)",
-            "CREATE INDEX customer_email_idx IF NOT EXISTS FOR (c:Customer) ON (c.email)",
-            "CREATE INDEX staff_id_idx IF NOT EXISTS FOR (st:Staff) ON (st.id)",
-            "CREATE INDEX staff_name_idx IF NOT EXISTS FOR (st:Staff) ON (st.name)",
-            "CREATE INDEX appointment_id_idx IF NOT EXISTS FOR (a:Appointment) ON (a.id)",
-            "CREATE INDEX appointment_date_idx IF NOT EXISTS FOR (a:Appointment) ON (a.date)",
-            "CREATE INDEX category_name_idx IF NOT EXISTS FOR (sc:ServiceCategory) ON (sc.name)"
+            # Uniqueness constraints on the MERGE keys let MERGE seek their backing
+            # index instead of locking the whole label; they replace the plain indexes
+            "DROP INDEX service_id_idx IF EXISTS",
+            "DROP INDEX customer_id_idx IF EXISTS",
+            "DROP INDEX staff_id_idx IF EXISTS",
+            "DROP INDEX appointment_id_idx IF EXISTS",
+            "DROP INDEX category_name_idx IF EXISTS",
+            "CREATE CONSTRAINT service_id_unique IF NOT EXISTS FOR (s:Service) REQUIRE s.id IS UNIQUE",
+            "CREATE CONSTRAINT customer_id_unique IF NOT EXISTS FOR (c:Customer) REQUIRE c.id IS UNIQUE",
+            "CREATE CONSTRAINT staff_id_unique IF NOT EXISTS FOR (st:Staff) REQUIRE st.id IS UNIQUE",
+            "CREATE CONSTRAINT appointment_id_unique IF NOT EXISTS FOR (a:Appointment) REQUIRE a.id IS UNIQUE",
+            "CREATE CONSTRAINT category_name_unique IF NOT EXISTS FOR (sc:ServiceCategory) REQUIRE sc.name IS UNIQUE",
+            # No query looks these properties up, so they only slowed down writes
+            "DROP INDEX customer_email_idx IF EXISTS",
+            "DROP INDEX staff_name_idx IF EXISTS",
+            "DROP INDEX appointment_date_idx IF EXISTS"
         ]
         
         for index in indexes:
-            await self.graph_db.execute_query(index)
-            logger.info(f"Created index: {index}")
+            await self.graph_db.execute_write_query(index)
+            logger.info(f"Executed schema query: {index}")
             
     async def verify_population(self):
         """Verify that the data was populated correctly."""
-        queries = [
-            ("Services", "MATCH (s:Service) RETURN count(s) as count"),
-            ("Staff", "MATCH (st:Staff) RETURN count(st) as count"),
-            ("Customers", "MATCH (c:Customer) RETURN count(c) as count"),
-            ("Appointments", "MATCH (a:Appointment) RETURN count(a) as count"),
-            ("Service Categories", "MATCH (sc:ServiceCategory) RETURN count(sc) as count"),
-            ("Service Relationships", "MATCH (s1:Service)-[r]->(s2:Service) RETURN count(r) as count"),
-            ("Customer Preferences", "MATCH (c:Customer)-[:PREFERS]->(s:Service) RETURN count(*) as count"),
-            ("Staff Specializations", "MATCH (st:Staff)-[:CAN_PERFORM]->(s:Service) RETURN count(*) as count")
+        # Fetch every count in a single round-trip
+        query = """
+        CALL { MATCH (s:Service) RETURN count(s) AS services }
+        CALL { MATCH (st:Staff) RETURN count(st) AS staff }
+        CALL { MATCH (c:Customer) RETURN count(c) AS customers }
+        CALL { MATCH (a:Appointment) RETURN count(a) AS appointments }
+        CALL { MATCH (sc:ServiceCategory) RETURN count(sc) AS categories }
+        CALL { MATCH (:Service)-[r]->(:Service) RETURN count(r) AS service_relationships }
+        CALL { MATCH (:Customer)-[:PREFERS]->(:Service) RETURN count(*) AS preferences }
+        CALL { MATCH (:Staff)-[:CAN_PERFORM]->(:Service) RETURN count(*) AS specializations }
+        RETURN {
+            services: services, staff: staff, customers: customers,
+            appointments: appointments, categories: categories,
+            service_relationships: service_relationships,
+            preferences: preferences, specializations: specializations
+        } AS counts
+        """
+        columns = [
+            ("Services", "services"),
+            ("Staff", "staff"),
+            ("Customers", "customers"),
+            ("Appointments", "appointments"),
+            ("Service Categories", "categories"),
+            ("Service Relationships", "service_relationships"),
+            ("Customer Preferences", "preferences"),
+            ("Staff Specializations", "specializations")
         ]
         
+        counts = await self.graph_db.execute_scalar(query, key="counts", default={})
+        
         verification_results = {}
-        for name, query in queries:
-            result = await self.graph_db.execute_query(query)
-            count = result[0]["count"] if result else 0
+        for name, column in columns:
+            count = counts.get(column, 0)
             verification_results[name] = count
             logger.info(f"{name}: {count}")
             
@@ -610,6 +340,7 @@ class SpaGraphPopulator:
                 MATCH (s:Service {name: 'Swedish Massage'})-[:ALTERNATIVE|COMPLEMENTS]-(similar:Service)
                 RETURN similar.name as service, similar.price as price
                 ORDER BY similar.popularity DESC
+                LIMIT 3
                 """
             },
             {
@@ -618,6 +349,7 @@ class SpaGraphPopulator:
                 MATCH (st:Staff)-[:CAN_PERFORM]->(s:Service {name: 'Deep Tissue Massage'})
                 RETURN st.name as staff, st.rating as rating, st.experience_years as experience
                 ORDER BY st.rating DESC
+                LIMIT 3
                 """
             },
             {
@@ -626,6 +358,7 @@ class SpaGraphPopulator:
                 MATCH (c:Customer)-[:PREFERS]->(s:Service)-[:BELONGS_TO]->(sc:ServiceCategory)
                 WHERE sc.name IN ['Massage Therapy', 'Wellness Treatments']
                 RETURN c.name as customer, collect(s.name) as preferred_services
+                LIMIT 3
                 """
             },
             {
@@ -634,6 +367,7 @@ class SpaGraphPopulator:
                 MATCH (s1:Service)-[r:COMPLEMENTS]->(s2:Service)
                 RETURN s1.name as service1, s2.name as service2, r.strength as strength
                 ORDER BY r.strength DESC
+                LIMIT 3
                 """
             }
         ]
@@ -641,7 +375,7 @@ class SpaGraphPopulator:
         test_results = {}
         for test in queries:
             result = await self.graph_db.execute_query(test["query"])
-            test_results[test["name"]] = result[:3]  # Top 3 results
+            test_results[test["name"]] = result  # Top 3 results, limited server-side
             logger.info(f"Test query '{test['name']}': {len(result)} results")
             
         return test_results
@@ -654,31 +388,8 @@ async def main():
         # Connect to database
         await populator.connect()
         
-        # Clear existing data (development only)
-        logger.info("Clearing existing data...")
-        await populator.clear_database()
-        
-        # Create nodes and relationships
-        logger.info("Creating service categories...")
-        await populator.create_service_categories()
-        
-        logger.info("Creating services...")
-        await populator.create_services()
-        
-        logger.info("Creating staff members...")
-        await populator.create_staff_members()
-        
-        logger.info("Creating sample customers...")
-        await populator.create_sample_customers()
-        
-        logger.info("Creating service relationships...")
-        await populator.create_service_relationships()
-        
-        logger.info("Creating sample appointments...")
-        await populator.create_sample_appointments()
-        
-        logger.info("Creating indexes...")
-        await populator.create_indexes()
+        # Populate the graph
+        await populator.run_all()
         
         # Verify population
         logger.info("Verifying population...")
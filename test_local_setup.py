@@ -4,19 +4,31 @@ Test script to verify local development setup
 """
 import asyncio
 import sys
-import os
-sys.path.append('.')
+
+from sqlalchemy.ext.asyncio import AsyncEngine
 
 from app.core.config import settings
-from app.core.database import get_async_session
+from app.core.database import engine
 from app.core.graph_db import get_graph_db
+from app.core.redis_client import close_redis, redis_client
+
+# uvloop (installed with uvicorn[standard]) is a faster event loop; fall back
+# to the default loop where it isn't available
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
+# Values still starting with these are unedited .env.example placeholders
+PLACEHOLDER_PREFIXES = ("your_", "YOUR_")
 
-async def test_postgresql():
+async def test_postgresql(engine: AsyncEngine):
     """Test PostgreSQL connection"""
     try:
         from sqlalchemy import text
-        async with get_async_session() as session:
-            result = await session.execute(text("SELECT 1"))
+        async with engine.connect() as conn:
+            result = await conn.execute(text("SELECT 1"))
             print("✅ PostgreSQL: Connected successfully")
             return True
     except Exception as e:
@@ -37,9 +49,8 @@ async def test_neo4j():
 async def test_redis():
     """Test Redis connection"""
     try:
-        import redis
-        r = redis.Redis(host=settings.redis_host, port=settings.redis_port, decode_responses=True)
-        r.ping()
+        # The asyncio client doesn't block the other concurrent checks
+        await redis_client.ping()
         print("✅ Redis: Connected successfully")
         return True
     except Exception as e:
@@ -55,15 +66,14 @@ def test_env_variables():
         ("NEO4J_URI", settings.neo4j_uri),
     ]
     
-    all_good = True
-    for name, value in tests:
-        if value and not value.startswith("your_") and not value.startswith("YOUR_"):
-            print(f"✅ {name}: Configured")
-        else:
-            print(f"❌ {name}: Not configured or using placeholder")
-            all_good = False
+    results = [(name, bool(value) and not value.startswith(PLACEHOLDER_PREFIXES)) for name, value in tests]
     
-    return all_good
+    print("\n".join(
+        f"✅ {name}: Configured" if ok else f"❌ {name}: Not configured or using placeholder"
+        for name, ok in results
+    ))
+    
+    return all(ok for _, ok in results)
 
 async def main():
     """Main test function"""
@@ -76,9 +86,16 @@ async def main():
     
     # Test database connections
     print("\n🗄️ Database Connections:")
-    pg_ok = await test_postgresql()
-    neo4j_ok = await test_neo4j()
-    redis_ok = await test_redis()
+    try:
+        pg_ok, neo4j_ok, redis_ok = await asyncio.gather(
+            test_postgresql(engine),
+            test_neo4j(),
+            test_redis()
+        )
+    finally:
+        # Close the pooled connections while the event loop is still running
+        await engine.dispose()
+        await close_redis()
     
     # Summary
     print("\n📊 Summary:")